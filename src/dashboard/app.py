@@ -1,21 +1,33 @@
 """Streamlit dashboard with interactive crime heatmap for the Netherlands."""
 
+import hashlib
 import json
+import pickle
 import sys
+import time
 from pathlib import Path
 
 # Ensure project root is on the Python path
 sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import streamlit as st
 from sqlalchemy import text
+from sqlalchemy.exc import OperationalError, ProgrammingError
 
 from src.database.connection import engine
 
 DATA_DIR = Path(__file__).resolve().parents[2] / "data" / "raw"
+CACHE_DIR = Path(__file__).resolve().parents[2] / "data" / "cache"
+AGG_CACHE_TTL = 600  # seconds; matches the st.cache_data TTL
 
 st.set_page_config(
     page_title="Netherlands Crime Dashboard",
@@ -25,33 +37,172 @@ st.set_page_config(
 
 
 @st.cache_data(ttl=600)
-def load_crime_data() -> pd.DataFrame:
-    """Load aggregated crime data from the database."""
-    query = text("""
+def load_filter_options() -> tuple[list[int], list[str]]:
+    """Load the available years and crime types for the sidebar filters.
+
+    Cached so widget clicks don't re-query the dimension tables; the
+    options only change when the pipeline loads new data.
+    """
+    with engine.connect() as conn:
+        years = [
+            row[0]
+            for row in conn.execute(text("SELECT DISTINCT year FROM dim_periods ORDER BY year"))
+        ]
+        crime_types = [
+            row[0]
+            for row in conn.execute(text("SELECT crime_name FROM dim_crime_types ORDER BY crime_name"))
+        ]
+    return years, crime_types
+
+
+def _read_sql(mv_sql: str, fact_sql: str, params: dict) -> pd.DataFrame:
+    """Query the materialized view, falling back to the base tables.
+
+    The fallback covers databases loaded before mv_crime_by_muni_year_crime
+    existed (i.e. the pipeline has not been rerun yet).
+    """
+    try:
+        with engine.connect() as conn:
+            return pd.read_sql(text(mv_sql).bindparams(**params), conn)
+    except ProgrammingError:
+        with engine.connect() as conn:
+            return pd.read_sql(text(fact_sql).bindparams(**params), conn)
+
+
+def _agg_cache_path(selected_year: int, selected_crime: str) -> Path:
+    """Filesystem-safe Parquet cache path for one (year, crime) selection."""
+    key = hashlib.md5(f"{selected_year}|{selected_crime}".encode()).hexdigest()[:12]
+    return CACHE_DIR / f"agg_{key}.parquet"
+
+
+@st.cache_data(ttl=600)
+def load_aggregated(selected_year: int, selected_crime: str) -> pd.DataFrame:
+    """Load per-municipality aggregates for one (year, crime) selection.
+
+    The WHERE/GROUP BY runs in PostgreSQL so only ~400 municipality rows
+    travel over the wire instead of the full fact table. Results are also
+    persisted to a local Parquet cache (dictionary-encoded categoricals,
+    zstd) so fresh Streamlit processes skip the DB round-trip and the
+    dashboard stays up through short database outages.
+    """
+    cache_path = _agg_cache_path(selected_year, selected_crime)
+    if cache_path.exists() and time.time() - cache_path.stat().st_mtime < AGG_CACHE_TTL:
+        return pd.read_parquet(cache_path)
+
+    mv_sql = """
+        SELECT
+            region_code,
+            region_name,
+            SUM(total_crimes) AS total_crimes,
+            AVG(avg_rate_per_1000) AS avg_rate_per_1000
+        FROM mv_crime_by_muni_year_crime
+        WHERE year = :year
+    """
+    fact_sql = """
         SELECT
             r.region_code,
             r.region_name,
-            ct.crime_code,
-            ct.crime_name,
-            p.year,
-            f.registered_crimes,
-            f.registered_crimes_per_1000
+            SUM(f.registered_crimes) AS total_crimes,
+            AVG(f.registered_crimes_per_1000) AS avg_rate_per_1000
         FROM fact_crimes f
         JOIN dim_regions r ON f.region_id = r.id
-        JOIN dim_crime_types ct ON f.crime_type_id = ct.id
         JOIN dim_periods p ON f.period_id = p.id
-    """)
-    with engine.connect() as conn:
-        df = pd.read_sql(query, conn)
+        JOIN dim_crime_types ct ON f.crime_type_id = ct.id
+        WHERE p.year = :year
+    """
+    params = {"year": selected_year}
+    if selected_crime != "All":
+        mv_sql += " AND crime_name = :crime"
+        fact_sql += " AND ct.crime_name = :crime"
+        params["crime"] = selected_crime
+    mv_sql += " GROUP BY region_code, region_name"
+    fact_sql += " GROUP BY r.region_code, r.region_name"
+
+    try:
+        df = _read_sql(mv_sql, fact_sql, params)
+    except OperationalError:
+        # Database unreachable: serve the stale cache if we have one.
+        if cache_path.exists():
+            return pd.read_parquet(cache_path)
+        raise
+
+    # Categoricals for the string keys, float32 for the measures: the
+    # values fit comfortably and every downstream scan moves half the bytes.
+    df = df.astype(
+        {
+            "region_code": "category",
+            "region_name": "category",
+            "total_crimes": "float32",
+            "avg_rate_per_1000": "float32",
+        }
+    )
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    df.to_parquet(cache_path, engine="pyarrow", compression="zstd", index=False)
     return df
 
 
 @st.cache_data(ttl=600)
+def load_yearly_totals(selected_crime: str) -> pd.DataFrame:
+    """Load national yearly totals for the trend line."""
+    mv_sql = """
+        SELECT year, SUM(total_crimes) AS total_crimes
+        FROM mv_crime_by_muni_year_crime
+    """
+    fact_sql = """
+        SELECT p.year, SUM(f.registered_crimes) AS total_crimes
+        FROM fact_crimes f
+        JOIN dim_periods p ON f.period_id = p.id
+        JOIN dim_crime_types ct ON f.crime_type_id = ct.id
+    """
+    params = {}
+    if selected_crime != "All":
+        mv_sql += " WHERE crime_name = :crime"
+        fact_sql += " WHERE ct.crime_name = :crime"
+        params["crime"] = selected_crime
+    mv_sql += " GROUP BY year ORDER BY year"
+    fact_sql += " GROUP BY p.year ORDER BY p.year"
+
+    return _read_sql(mv_sql, fact_sql, params).astype({"year": "int16", "total_crimes": "float32"})
+
+
+@st.cache_data(ttl=600)
+def aggregated_for_map(selected_year: int, selected_crime: str, strip_gm: bool) -> pd.DataFrame:
+    """Aggregate with region codes matched to the GeoJSON's convention.
+
+    Stripping the 'GM' prefix happens inside the cache, so renders after
+    the first pay nothing for the column rewrite.
+    """
+    agg = load_aggregated(selected_year, selected_crime)
+    if strip_gm and not agg.empty and str(agg["region_code"].iloc[0]).startswith("GM"):
+        agg = agg.assign(region_code=agg["region_code"].astype(str).str.removeprefix("GM"))
+    return agg
+
+
+@st.cache_resource
 def load_geojson() -> dict:
-    """Load simplified municipality GeoJSON boundaries."""
-    geo_path = DATA_DIR / "municipalities.geojson"
-    with open(geo_path, encoding="utf-8") as f:
-        return json.load(f)
+    """Load municipality GeoJSON boundaries, preferring the low-res variant.
+
+    The map only needs the heavily simplified geometries; the full-detail
+    file stays on disk for anything that wants hover-quality boundaries.
+
+    The parsed dict is cached by reference (st.cache_resource, so no
+    pickle roundtrip per read) and additionally persisted as a pickle
+    next to the GeoJSON so warm restarts skip the JSON parse entirely.
+    """
+    geo_path = DATA_DIR / "municipalities_lo.geojson"
+    if not geo_path.exists():
+        geo_path = DATA_DIR / "municipalities.geojson"
+
+    pkl_path = geo_path.with_suffix(".pkl")
+    if pkl_path.exists() and pkl_path.stat().st_mtime >= geo_path.stat().st_mtime:
+        with open(pkl_path, "rb") as f:
+            return pickle.load(f)
+
+    raw = geo_path.read_bytes()
+    geojson = orjson.loads(raw) if orjson is not None else json.loads(raw)
+    with open(pkl_path, "wb") as f:
+        pickle.dump(geojson, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return geojson
 
 
 def get_municipality_code_field(geojson: dict) -> str:
@@ -65,26 +216,47 @@ def get_municipality_code_field(geojson: dict) -> str:
     return list(props.keys())[0]
 
 
+@st.cache_resource
+def geo_index(_geojson: dict, code_field: str) -> pd.DataFrame:
+    """Municipality codes and names from the GeoJSON, built once per code field.
+
+    Cached by reference (never mutated downstream), so repeat renders
+    skip both the rebuild and the cache-pickle roundtrip. The _geojson
+    arg is excluded from hashing; the cache keys on code_field alone,
+    which is fine because the GeoJSON is itself a per-process singleton.
+    """
+    records = [
+        (
+            feat["properties"].get(code_field, ""),
+            feat["properties"].get("naam", feat["properties"].get(code_field, "")),
+        )
+        for feat in _geojson.get("features", [])
+    ]
+    frame = pd.DataFrame.from_records(records, columns=["region_code", "geo_name"])
+    frame["region_code"] = pd.Categorical(frame["region_code"])
+    return frame.set_index("region_code")
+
+
 def ensure_all_municipalities(
     geojson: dict, agg: pd.DataFrame, code_field: str, value_col: str,
 ) -> pd.DataFrame:
     """Left join: ensure every GeoJSON municipality appears in the data."""
-    geo_codes = []
-    geo_names = []
-    for feat in geojson.get("features", []):
-        props = feat.get("properties", {})
-        geo_codes.append(props.get(code_field, ""))
-        geo_names.append(props.get("naam", props.get(code_field, "")))
-
-    all_munis = pd.DataFrame({"region_code": geo_codes, "geo_name": geo_names})
-    merged = all_munis.merge(agg, on="region_code", how="left")
+    all_munis = geo_index(geojson, code_field)
 
-    # Fill missing region names from GeoJSON
-    merged["region_name"] = merged["region_name"].fillna(merged["geo_name"])
-    merged["has_data"] = merged[value_col].notna()
-    merged = merged.drop(columns=["geo_name"])
+    # Align the aggregate's key to the GeoJSON's categories so the join
+    # runs on integer category codes instead of rehashing string keys on
+    # every filter change.
+    agg_indexed = agg.drop(columns="region_code").set_index(
+        pd.CategoricalIndex(agg["region_code"], categories=all_munis.index.categories)
+    )
+    merged = all_munis.join(agg_indexed, how="left").reset_index(names="region_code")
 
-    return merged
+    # region_name may be categorical and can't hold unseen GeoJSON names;
+    # widen it before filling the gaps.
+    return merged.assign(
+        region_name=merged["region_name"].astype(object).fillna(merged["geo_name"]),
+        has_data=merged[value_col].notna(),
+    ).drop(columns="geo_name")
 
 
 def build_choropleth(
@@ -94,84 +266,94 @@ def build_choropleth(
     value_col: str,
     metric_label: str,
 ) -> go.Figure:
-    """Build a Plotly choropleth map of the Netherlands."""
-    has_data = map_data[map_data["has_data"]].copy()
-    no_data = map_data[~map_data["has_data"]].copy()
-
-    fig = px.choropleth_mapbox(
+    """Build a Plotly choropleth map of the Netherlands as a single trace.
+
+    Municipalities without data are folded into the same trace using a
+    sentinel value just below the real range, which the colorscale maps
+    to gray. One trace means Plotly builds the GeoJSON mesh once per
+    render instead of twice.
+    """
+    values = map_data[value_col].astype(float)
+    has_data = map_data["has_data"]
+
+    if has_data.any():
+        vmin, vmax = float(values.min()), float(values.max())
+    else:
+        vmin, vmax = 0.0, 1.0
+    span = (vmax - vmin) or 1.0
+    sentinel = vmin - 0.05 * span
+
+    # Gray band below the data range, then the regular OrRd ramp.
+    orrd = px.colors.sequential.OrRd
+    cut = (vmin - sentinel) / (vmax - sentinel)
+    colorscale = [[0.0, "#d3d3d3"], [cut, "#d3d3d3"]]
+    colorscale += [
+        [cut + (1.0 - cut) * i / (len(orrd) - 1), color] for i, color in enumerate(orrd)
+    ]
+
+    hover_info = np.where(
         has_data,
-        geojson=geojson,
-        locations="region_code",
-        featureidkey=f"properties.{code_field}",
-        color=value_col,
-        color_continuous_scale="OrRd",
-        hover_name="region_name",
-        hover_data={
-            "region_code": False,
-            value_col: ":.1f",
-        },
-        labels={value_col: metric_label},
-        mapbox_style="carto-positron",
-        center={"lat": 52.2, "lon": 5.3},
-        zoom=6.3,
-        opacity=0.7,
+        metric_label + ": " + values.round(1).astype(str),
+        "No data available",
     )
 
-    if not no_data.empty:
-        no_data[value_col] = 0
-        fig_gray = px.choropleth_mapbox(
-            no_data,
+    fig = go.Figure(
+        go.Choroplethmapbox(
             geojson=geojson,
-            locations="region_code",
+            locations=map_data["region_code"].astype(str),
             featureidkey=f"properties.{code_field}",
-            color_discrete_sequence=["#d3d3d3"],
-            hover_name="region_name",
-            hover_data={"region_code": False},
-            mapbox_style="carto-positron",
-            center={"lat": 52.2, "lon": 5.3},
-            zoom=6.3,
-            opacity=0.5,
+            z=values.fillna(sentinel),
+            zmin=sentinel,
+            zmax=vmax,
+            colorscale=colorscale,
+            marker_opacity=0.7,
+            marker_line_width=0.5,
+            text=map_data["region_name"],
+            customdata=hover_info,
+            hovertemplate="<b>%{text}</b><br>%{customdata}<extra></extra>",
+            colorbar_title=metric_label,
         )
-        for trace in fig_gray.data:
-            trace.hovertemplate = "<b>%{hovertext}</b><br>No data available<extra></extra>"
-            trace.showlegend = False
-            fig.add_trace(trace)
+    )
 
     fig.update_layout(
+        mapbox_style="carto-positron",
+        mapbox_center={"lat": 52.2, "lon": 5.3},
+        mapbox_zoom=6.3,
         margin={"r": 0, "t": 0, "l": 0, "b": 0},
         height=600,
     )
     return fig
 
 
-@st.cache_data(ttl=600)
-def filter_and_aggregate(
-    _df: pd.DataFrame, selected_year: int, selected_crime: str,
-) -> pd.DataFrame:
-    """Cache filtered + aggregated data per filter combination."""
-    filtered = _df[_df["year"] == selected_year].copy()
-    if selected_crime != "All":
-        filtered = filtered[filtered["crime_name"] == selected_crime]
+@st.cache_resource(ttl=600)
+def cached_choropleth(
+    selected_year: int,
+    selected_crime: str,
+    value_col: str,
+    _geojson: dict,
+    _map_data: pd.DataFrame,
+    code_field: str,
+    metric_label: str,
+) -> go.Figure:
+    """Map figure cached per (year, crime, metric) selection.
 
-    agg = (
-        filtered.groupby(["region_code", "region_name"])
-        .agg(
-            total_crimes=("registered_crimes", "sum"),
-            avg_rate_per_1000=("registered_crimes_per_1000", "mean"),
-        )
-        .reset_index()
-    )
-    return agg
+    Switching back to a previously viewed selection reuses the built
+    figure instead of reassembling the whole GeoJSON trace. The large
+    args are underscore-skipped; they're fully determined by the key.
+    The TTL matches the data caches so a pipeline rerun refreshes the
+    map together with the cards and trend line.
+    """
+    return build_choropleth(_geojson, _map_data, code_field, value_col, metric_label)
 
 
 def main() -> None:
     st.title("Netherlands Crime Dashboard")
     st.markdown("Interactive visualization of registered crime across Dutch municipalities.")
 
-    # --- Load data with spinner ---
+    # --- Load filter options with spinner ---
     with st.spinner("Loading crime data from database..."):
         try:
-            df = load_crime_data()
+            years, crime_types = load_filter_options()
         except Exception as e:
             st.error(f"Failed to load crime data: {e}")
             st.info("Make sure the pipeline has been run and the database is available.")
@@ -184,17 +366,15 @@ def main() -> None:
             st.error(f"Failed to load GeoJSON: {e}")
             return
 
-    if df.empty:
+    if not years:
         st.warning("No crime data found. Run the pipeline first.")
         return
 
     # --- Sidebar filters ---
     st.sidebar.header("Filters")
 
-    years = sorted(df["year"].unique())
     selected_year = st.sidebar.selectbox("Year", years, index=len(years) - 1, key="year_filter")
 
-    crime_types = sorted(df["crime_name"].unique())
     selected_crime = st.sidebar.selectbox("Crime Type", ["All"] + crime_types, key="crime_filter")
 
     st.sidebar.divider()
@@ -215,18 +395,19 @@ def main() -> None:
     crime_label = "All Crime Types" if selected_crime == "All" else selected_crime
     st.info(f"Showing: **{crime_label}** in **{selected_year}** | Metric: **{selected_metric_label}**")
 
-    # --- Cached aggregation (instant on repeat filter) ---
-    agg = filter_and_aggregate(df, selected_year, selected_crime)
-
     code_field = get_municipality_code_field(geojson)
 
-    # Match GeoJSON codes to CBS codes
+    # Match GeoJSON codes to CBS codes: a single sample value decides
+    # whether the 'GM' prefix has to go, instead of scanning the column.
+    strip_gm = False
     if geojson.get("features"):
         sample_code = str(
             geojson["features"][0].get("properties", {}).get(code_field, "")
         )
-        if not sample_code.startswith("GM") and agg["region_code"].str.startswith("GM").all():
-            agg["region_code"] = agg["region_code"].str.replace("GM", "", n=1)
+        strip_gm = not sample_code.startswith("GM")
+
+    # --- Cached per-(year, crime) aggregate from the database ---
+    agg = aggregated_for_map(selected_year, selected_crime, strip_gm)
 
     agg = ensure_all_municipalities(geojson, agg, code_field, selected_metric)
 
@@ -254,12 +435,14 @@ def main() -> None:
     @st.fragment
     def render_visualizations():
         st.subheader(f"Crime Heatmap - {crime_label} ({selected_year})")
-        fig_map = build_choropleth(
-            geojson=geojson,
-            map_data=agg,
-            code_field=code_field,
-            value_col=selected_metric,
-            metric_label=selected_metric_label,
+        fig_map = cached_choropleth(
+            selected_year,
+            selected_crime,
+            selected_metric,
+            geojson,
+            agg,
+            code_field,
+            selected_metric_label,
         )
         st.plotly_chart(fig_map, use_container_width=True)
 
@@ -277,14 +460,7 @@ def main() -> None:
         st.plotly_chart(fig_bar, use_container_width=True)
 
         st.subheader(f"National Trend - {crime_label}")
-        trend_df = df.copy()
-        if selected_crime != "All":
-            trend_df = trend_df[trend_df["crime_name"] == selected_crime]
-        yearly = (
-            trend_df.groupby("year")
-            .agg(total_crimes=("registered_crimes", "sum"))
-            .reset_index()
-        )
+        yearly = load_yearly_totals(selected_crime)
         fig_line = px.line(
             yearly,
             x="year",
@@ -295,10 +471,14 @@ def main() -> None:
         st.plotly_chart(fig_line, use_container_width=True)
 
         with st.expander(f"View Raw Data - {crime_label} ({selected_year})"):
-            st.dataframe(
-                agg_with_data.sort_values("total_crimes", ascending=False),
-                use_container_width=True,
-            )
+            # Sort + Arrow serialization only happen once the table is
+            # actually requested, not on every rerun of a collapsed
+            # expander.
+            if st.checkbox("Show table", key="show_raw_data"):
+                st.dataframe(
+                    agg_with_data.sort_values("total_crimes", ascending=False),
+                    use_container_width=True,
+                )
 
     render_visualizations()
 
@@ -0,0 +1,28 @@
+"""Bulk COPY helpers for loading DataFrames into PostgreSQL."""
+
+import io
+
+import pandas as pd
+
+FACT_COLUMNS = [
+    "region_id",
+    "crime_type_id",
+    "period_id",
+    "registered_crimes",
+    "registered_crimes_per_1000",
+]
+
+
+def copy_dataframe(cursor, df: pd.DataFrame, table: str, columns: list[str]) -> None:
+    """Stream a DataFrame into a table via COPY FROM STDIN (CSV).
+
+    COPY bypasses per-row INSERT parsing and is orders of magnitude
+    faster than executemany-style loads for large frames.
+    """
+    buf = io.StringIO()
+    df.to_csv(buf, columns=columns, index=False, header=False, na_rep="\\N")
+    buf.seek(0)
+    col_list = ", ".join(columns)
+    cursor.copy_expert(
+        f"COPY {table} ({col_list}) FROM STDIN WITH (FORMAT CSV, NULL '\\N')", buf
+    )
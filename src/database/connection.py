@@ -21,7 +21,16 @@ def get_database_url() -> str:
     return f"postgresql://{user}:{password}@{host}:{port}/{db}"
 
 
-engine = create_engine(get_database_url())
+# Pooled engine shared by the pipeline and the dashboard: Streamlit
+# reruns grab checked-in connections instead of opening a fresh TCP+auth
+# handshake per query, and pre-ping drops connections Postgres closed.
+engine = create_engine(
+    get_database_url(),
+    pool_size=5,
+    max_overflow=5,
+    pool_pre_ping=True,
+    pool_recycle=1800,
+)
 SessionLocal = sessionmaker(bind=engine)
 
 
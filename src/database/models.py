@@ -1,7 +1,7 @@
 """SQLAlchemy ORM models for the crime data warehouse."""
 
 from geoalchemy2 import Geometry
-from sqlalchemy import Column, Float, ForeignKey, Integer, String, UniqueConstraint
+from sqlalchemy import Column, Float, ForeignKey, Index, Integer, String, UniqueConstraint
 from sqlalchemy.orm import DeclarativeBase, relationship
 
 
@@ -35,7 +35,7 @@ class DimPeriod(Base):
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     period_code = Column(String(20), unique=True, nullable=False)  # e.g. 2024JJ00
-    year = Column(Integer, nullable=False)
+    year = Column(Integer, nullable=False, index=True)
 
     crimes = relationship("FactCrime", back_populates="period")
 
@@ -56,4 +56,5 @@ class FactCrime(Base):
 
     __table_args__ = (
         UniqueConstraint("region_id", "crime_type_id", "period_id", name="uq_crime_fact"),
+        Index("ix_fact_crimes_period_crime", "period_id", "crime_type_id"),
     )
@@ -1,22 +1,68 @@
 """Ingest crime data from CBS Open Data (dataset 83648NED)."""
 
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import cbsodata
 import pandas as pd
+import requests
 
 logger = logging.getLogger(__name__)
 
 DATASET_ID = "83648NED"
 RAW_DIR = Path(__file__).resolve().parents[2] / "data" / "raw"
 
+ODATA_BASE = "https://opendata.cbs.nl/ODataApi/odata"
+PAGE_SIZE = 10_000
+MAX_WORKERS = 8
+
+# Dimension columns whose key codes get replaced by their titles, the
+# same substitution cbsodata.get_data performs.
+CATEGORICAL_DIMS = ["SoortMisdrijf", "RegioS", "Perioden"]
+
+SESSION = requests.Session()
+
+
+def _fetch_rows(skip: int) -> list[dict]:
+    """Fetch one page of the TypedDataSet feed."""
+    url = f"{ODATA_BASE}/{DATASET_ID}/TypedDataSet?$format=json&$top={PAGE_SIZE}&$skip={skip}"
+    resp = SESSION.get(url, timeout=120)
+    resp.raise_for_status()
+    return resp.json()["value"]
+
+
+def _apply_labels(df: pd.DataFrame) -> pd.DataFrame:
+    """Replace dimension key codes with their titles, as cbsodata.get_data does."""
+    for col in CATEGORICAL_DIMS:
+        if col not in df.columns:
+            continue
+        meta = pd.DataFrame(cbsodata.get_meta(DATASET_ID, col))
+        titles = dict(zip(meta["Key"].str.strip(), meta["Title"].str.strip()))
+        df[col] = df[col].str.strip().map(titles).fillna(df[col])
+    return df
+
 
 def fetch_crime_data() -> pd.DataFrame:
-    """Fetch registered crime data from CBS and return as DataFrame."""
+    """Fetch registered crime data from CBS and return as DataFrame.
+
+    The TypedDataSet feed is paginated concurrently after a $count probe,
+    which overlaps the serial round-trips cbsodata.get_data would make.
+    Any failure on the direct OData path falls back to cbsodata.
+    """
     logger.info("Fetching dataset %s from CBS Open Data...", DATASET_ID)
-    raw = cbsodata.get_data(DATASET_ID)
-    df = pd.DataFrame(raw)
+    try:
+        count_resp = SESSION.get(f"{ODATA_BASE}/{DATASET_ID}/TypedDataSet/$count", timeout=60)
+        count_resp.raise_for_status()
+        total = int(count_resp.text.strip())
+
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            pages = list(executor.map(_fetch_rows, range(0, total, PAGE_SIZE)))
+        df = _apply_labels(pd.DataFrame([row for page in pages for row in page]))
+    except (requests.RequestException, KeyError, ValueError) as e:
+        logger.warning("Direct OData fetch failed (%s); falling back to cbsodata", e)
+        df = pd.DataFrame(cbsodata.get_data(DATASET_ID))
+
     logger.info("Fetched %d rows with columns: %s", len(df), list(df.columns))
     return df
 
@@ -40,14 +86,18 @@ def filter_municipalities(df: pd.DataFrame, region_meta: pd.DataFrame) -> pd.Dat
 
     # Get municipality names from metadata (codes starting with GM)
     gm_meta = region_meta[region_meta["Key"].str.startswith("GM")]
-    municipality_names = set(gm_meta["Title"])
 
-    mask = df[col].isin(municipality_names)
-    filtered = df[mask].copy()
+    # Map each *distinct* region name to its GM code once, then fan out
+    # via integer category codes — one pass instead of hashing every
+    # row's string twice (isin + map).
+    names = pd.Categorical(df[col])
+    code_for_name = pd.Series(gm_meta["Key"].to_numpy(), index=gm_meta["Title"])
+    mapped = code_for_name.reindex(names.categories).to_numpy()
 
-    # Add the region code column by mapping name → code
-    name_to_code = dict(zip(gm_meta["Title"], gm_meta["Key"]))
-    filtered["region_code"] = filtered[col].map(name_to_code)
+    region_codes = mapped[names.codes]
+    mask = (names.codes >= 0) & pd.notna(region_codes)
+    filtered = df[mask].copy()
+    filtered["region_code"] = region_codes[mask]
 
     logger.info("Filtered to %d municipality-level rows (from %d total)", len(filtered), len(df))
     return filtered
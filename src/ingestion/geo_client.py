@@ -2,34 +2,101 @@
 
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import ijson
+import numpy as np
 import requests
-from shapely.geometry import mapping, shape
+import shapely
+from requests.adapters import HTTPAdapter
+from shapely.geometry import shape
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+
+def _dumps(obj: dict) -> bytes:
+    """Serialize to UTF-8 JSON bytes, preferring orjson's C encoder."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode()
+
+
+def _loads(data: str | bytes) -> dict:
+    """Parse JSON, preferring orjson's C decoder."""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
 PDOK_BASE = (
     "https://api.pdok.nl/kadaster/bestuurlijkegebieden/ogc/v1"
     "/collections/gemeentegebied/items"
 )
 RAW_DIR = Path(__file__).resolve().parents[2] / "data" / "raw"
 
-
-def fetch_municipalities_geojson() -> dict:
-    """Fetch all municipality boundaries from PDOK, handling pagination via 'next' links."""
+PAGE_SIZE = 100
+MAX_WORKERS = 8
+
+# Shared session: keep-alive across page fetches instead of a TLS
+# handshake per request, with retry + backoff on transient failures so a
+# flaky page doesn't restart the whole ingest. Rate-limit and gateway
+# errors (429/5xx) are retried; other 4xx fail fast.
+SESSION = requests.Session()
+SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=MAX_WORKERS,
+        pool_maxsize=MAX_WORKERS,
+        max_retries=Retry(
+            total=5,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+        ),
+    ),
+)
+# Ask for compressed payloads explicitly; requests gunzips transparently.
+SESSION.headers.update({"Accept-Encoding": "gzip"})
+
+# Tolerances in degrees (~1e-4 deg is roughly 10 m at Dutch latitudes).
+# The high-res file keeps hover-quality detail; the low-res file is what
+# the dashboard ships to the browser, so it is simplified much harder.
+HI_TOLERANCE = 0.0001
+LO_TOLERANCE = 0.001
+
+
+def _fetch_page(offset: int) -> list[dict]:
+    """Fetch one page of features at the given offset.
+
+    The response is parsed incrementally with ijson straight off the
+    socket, so feature dicts are built as bytes arrive instead of first
+    materializing the page's full JSON document tree.
+    """
+    url = f"{PDOK_BASE}?f=json&limit={PAGE_SIZE}&offset={offset}"
+    logger.info("Fetching PDOK page: %s", url)
+    resp = SESSION.get(url, timeout=60, stream=True)
+    resp.raise_for_status()
+    resp.raw.decode_content = True  # gunzip transparently when negotiated
+    # use_float keeps coordinates as floats rather than Decimal, which
+    # downstream shapely/orjson code expects.
+    return list(ijson.items(resp.raw, "features.item", use_float=True))
+
+
+def _fetch_sequential() -> list[dict]:
+    """Fallback: crawl pages one by one via OGC 'next' links."""
     all_features = []
-    url = f"{PDOK_BASE}?f=json&limit=100"
+    url = f"{PDOK_BASE}?f=json&limit={PAGE_SIZE}"
 
     while url:
         logger.info("Fetching PDOK page: %s", url)
-        resp = requests.get(url, timeout=60)
+        resp = SESSION.get(url, timeout=60)
         resp.raise_for_status()
         data = resp.json()
 
-        features = data.get("features", [])
-        all_features.extend(features)
-        logger.info("Got %d features (total so far: %d)", len(features), len(all_features))
+        all_features.extend(data.get("features", []))
 
         # Follow OGC 'next' link for pagination
         url = None
@@ -38,6 +105,29 @@ def fetch_municipalities_geojson() -> dict:
                 url = link["href"]
                 break
 
+    return all_features
+
+
+def fetch_municipalities_geojson() -> dict:
+    """Fetch all municipality boundaries from PDOK with concurrent page requests.
+
+    A one-feature probe reads OGC's numberMatched so all page offsets are
+    known up front and can be fetched in parallel; without it the fetch
+    falls back to the serial 'next'-link crawl.
+    """
+    probe = SESSION.get(f"{PDOK_BASE}?f=json&limit=1", timeout=60)
+    probe.raise_for_status()
+    total = probe.json().get("numberMatched")
+
+    if total:
+        offsets = range(0, total, PAGE_SIZE)
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            pages = list(executor.map(_fetch_page, offsets))
+        all_features = [feat for page in pages for feat in page]
+    else:
+        logger.warning("PDOK response has no numberMatched; falling back to serial pagination")
+        all_features = _fetch_sequential()
+
     geojson = {
         "type": "FeatureCollection",
         "features": all_features,
@@ -46,18 +136,25 @@ def fetch_municipalities_geojson() -> dict:
     return geojson
 
 
-def simplify_geojson(geojson: dict, tolerance: float = 0.0001) -> dict:
-    """Simplify polygon geometries to reduce file size while preserving shape."""
-    simplified_features = []
-    for feature in geojson["features"]:
-        geom = shape(feature["geometry"])
-        simple_geom = geom.simplify(tolerance, preserve_topology=True)
-        feature_copy = {
+def simplify_geojson(geojson: dict, tolerance: float = HI_TOLERANCE) -> dict:
+    """Simplify polygon geometries to reduce file size while preserving shape.
+
+    The whole feature array goes through shapely.simplify in one
+    vectorized call, so GEOS loops over the geometries in C instead of
+    one Python↔GEOS round-trip per polygon.
+    """
+    features = geojson["features"]
+    geoms = np.array([shape(feat["geometry"]) for feat in features], dtype=object)
+    simplified = shapely.simplify(geoms, tolerance, preserve_topology=True)
+
+    simplified_features = [
+        {
             "type": "Feature",
-            "properties": feature["properties"],
-            "geometry": mapping(simple_geom),
+            "properties": feat["properties"],
+            "geometry": _loads(geom_json),
         }
-        simplified_features.append(feature_copy)
+        for feat, geom_json in zip(features, shapely.to_geojson(simplified))
+    ]
 
     result = {"type": "FeatureCollection", "features": simplified_features}
     logger.info("Simplified %d features (tolerance=%.4f)", len(simplified_features), tolerance)
@@ -65,20 +162,33 @@ def simplify_geojson(geojson: dict, tolerance: float = 0.0001) -> dict:
 
 
 def save_geojson(geojson: dict, filename: str = "municipalities.geojson") -> Path:
-    """Save GeoJSON to the raw data landing zone."""
+    """Save GeoJSON to the raw data landing zone.
+
+    Features are serialized one at a time with orjson and streamed to the
+    file, so the full multi-MB document is never held as a single Python
+    string.
+    """
     RAW_DIR.mkdir(parents=True, exist_ok=True)
     path = RAW_DIR / filename
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(geojson, f, ensure_ascii=False)
+    with open(path, "wb") as f:
+        f.write(b'{"type":"FeatureCollection","features":[')
+        for i, feature in enumerate(geojson["features"]):
+            if i:
+                f.write(b",")
+            f.write(_dumps(feature))
+        f.write(b"]}")
     logger.info("Saved municipality GeoJSON to %s (%d features)", path, len(geojson["features"]))
     return path
 
 
 def ingest_geo_data() -> Path:
-    """Full geo ingestion: fetch → simplify → save."""
+    """Full geo ingestion: fetch → simplify → save hi- and lo-res variants."""
     geojson = fetch_municipalities_geojson()
-    geojson = simplify_geojson(geojson)
-    return save_geojson(geojson)
+    save_geojson(simplify_geojson(geojson, tolerance=HI_TOLERANCE))
+    return save_geojson(
+        simplify_geojson(geojson, tolerance=LO_TOLERANCE),
+        filename="municipalities_lo.geojson",
+    )
 
 
 if __name__ == "__main__":
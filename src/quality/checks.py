@@ -2,6 +2,7 @@
 
 import logging
 
+import numpy as np
 import pandas as pd
 
 logger = logging.getLogger(__name__)
@@ -20,27 +21,33 @@ def check_not_empty(df: pd.DataFrame, name: str) -> None:
 
 def check_no_nulls(df: pd.DataFrame, columns: list[str], name: str) -> None:
     """Verify specified columns have no null values."""
-    for col in columns:
-        null_count = df[col].isna().sum()
-        if null_count > 0:
-            raise QualityCheckError(f"{name}.{col} has {null_count} null values")
+    # One fused reduction over all columns instead of a pass per column.
+    null_counts = df[columns].isna().sum()
+    bad = null_counts[null_counts > 0]
+    if not bad.empty:
+        col, count = next(iter(bad.items()))
+        raise QualityCheckError(f"{name}.{col} has {count} null values")
     logger.info("PASS: %s has no nulls in %s", name, columns)
 
 
 def check_non_negative(df: pd.DataFrame, columns: list[str], name: str) -> None:
     """Verify numeric columns have no negative values (ignoring nulls)."""
-    for col in columns:
-        negative_count = (df[col].dropna() < 0).sum()
-        if negative_count > 0:
-            raise QualityCheckError(f"{name}.{col} has {negative_count} negative values")
+    # NaN compares False against 0, so no dropna copies are needed.
+    values = df[columns].to_numpy(dtype=float)
+    negative_counts = (values < 0).sum(axis=0)
+    for col, count in zip(columns, negative_counts):
+        if count:
+            raise QualityCheckError(f"{name}.{col} has {count} negative values")
     logger.info("PASS: %s has no negatives in %s", name, columns)
 
 
 def check_unique(df: pd.DataFrame, columns: list[str], name: str) -> None:
     """Verify column(s) form a unique key."""
-    duplicate_count = df.duplicated(subset=columns).sum()
-    if duplicate_count > 0:
-        raise QualityCheckError(f"{name} has {duplicate_count} duplicate rows on {columns}")
+    dup_mask = df.duplicated(subset=columns)
+    # .any() early-exits at the first duplicate; only the error branch
+    # pays for the full count.
+    if dup_mask.any():
+        raise QualityCheckError(f"{name} has {int(dup_mask.sum())} duplicate rows on {columns}")
     logger.info("PASS: %s is unique on %s", name, columns)
 
 
@@ -52,16 +59,34 @@ def check_referential_integrity(
     name: str,
 ) -> None:
     """Verify all fact foreign keys exist in the dimension table."""
-    fact_keys = set(fact_df[fact_col].dropna().unique())
-    dim_keys = set(dim_df[dim_col].unique())
-    orphans = fact_keys - dim_keys
-    if orphans:
+    # C-level sorted set difference instead of hashing every key as a
+    # Python object in two set builds.
+    fact_keys = fact_df[fact_col].dropna().unique()
+    dim_keys = dim_df[dim_col].unique()
+    orphans = np.setdiff1d(fact_keys, dim_keys, assume_unique=True)
+    if orphans.size:
         raise QualityCheckError(
-            f"{name}: {len(orphans)} orphan keys in fact.{fact_col} not found in dim.{dim_col}"
+            f"{name}: {orphans.size} orphan keys in fact.{fact_col} not found in dim.{dim_col}"
         )
     logger.info("PASS: %s referential integrity OK (%d keys)", name, len(fact_keys))
 
 
+def check_dense_fk(fact_df: pd.DataFrame, fact_col: str, dim_len: int, name: str) -> None:
+    """Verify fact foreign keys fall inside a dense 0..dim_len-1 dimension.
+
+    The transform builds dimensions with a dense positional index, so
+    integrity reduces to a min/max range check — two NumPy reductions
+    instead of building a hash set of dimension keys.
+    """
+    arr = fact_df[fact_col].to_numpy()
+    if arr.size and (arr.min() < 0 or arr.max() >= dim_len):
+        orphans = int(((arr < 0) | (arr >= dim_len)).sum())
+        raise QualityCheckError(
+            f"{name}: {orphans} orphan keys in fact.{fact_col} outside 0..{dim_len - 1}"
+        )
+    logger.info("PASS: %s referential integrity OK (%d keys)", name, arr.size)
+
+
 def run_all_checks(tables: dict[str, pd.DataFrame]) -> None:
     """Run all quality checks on the transformed tables."""
     dim_regions = tables["dim_regions"]
@@ -87,15 +112,10 @@ def run_all_checks(tables: dict[str, pd.DataFrame]) -> None:
     # Non-negative values
     check_non_negative(fact_crimes, ["registered_crimes"], "fact_crimes")
 
-    # Referential integrity
-    check_referential_integrity(
-        fact_crimes, "region_id", dim_regions.reset_index(), "index", "fact→dim_regions"
-    )
-    check_referential_integrity(
-        fact_crimes, "crime_type_id", dim_crime_types.reset_index(), "index", "fact→dim_crime_types"
-    )
-    check_referential_integrity(
-        fact_crimes, "period_id", dim_periods.reset_index(), "index", "fact→dim_periods"
-    )
+    # Referential integrity: the dimensions carry a dense 0..N-1 index,
+    # so the range fast path replaces the generic set-difference check.
+    check_dense_fk(fact_crimes, "region_id", len(dim_regions), "fact→dim_regions")
+    check_dense_fk(fact_crimes, "crime_type_id", len(dim_crime_types), "fact→dim_crime_types")
+    check_dense_fk(fact_crimes, "period_id", len(dim_periods), "fact→dim_periods")
 
     logger.info("All quality checks passed!")
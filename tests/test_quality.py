@@ -5,6 +5,7 @@ import pandas as pd
 
 from src.quality.checks import (
     QualityCheckError,
+    check_dense_fk,
     check_no_nulls,
     check_non_negative,
     check_not_empty,
@@ -54,3 +55,14 @@ def test_check_unique_fails():
     df = pd.DataFrame({"code": ["A", "B", "A"]})
     with pytest.raises(QualityCheckError, match="duplicate"):
         check_unique(df, ["code"], "test")
+
+
+def test_check_dense_fk_passes():
+    df = pd.DataFrame({"region_id": [0, 1, 2]})
+    check_dense_fk(df, "region_id", 3, "test")
+
+
+def test_check_dense_fk_fails():
+    df = pd.DataFrame({"region_id": [0, 3]})
+    with pytest.raises(QualityCheckError, match="orphan"):
+        check_dense_fk(df, "region_id", 3, "test")